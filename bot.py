@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
 
@@ -27,10 +26,12 @@ LOGGER = logging.getLogger(__name__)
 def build_service() -> VolatilityReportService:
     bybit = BybitClient()
     analyzer = VolatilityAnalyzer()
-    return VolatilityReportService(bybit=bybit, analyzer=analyzer)
-
-
-SERVICE = build_service()
+    try:
+        analyzer.warmup()
+    except Exception as exc:  # pylint: disable=broad-except
+        LOGGER.warning("Analysis kernel warm-up failed; it will compile on first use.", exc_info=exc)
+    max_workers = int(os.getenv("ANALYSIS_POOL_SIZE", "4"))
+    return VolatilityReportService(bybit=bybit, analyzer=analyzer, max_workers=max_workers)
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -73,7 +74,7 @@ async def dca_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     await update.message.chat.send_action(action=ChatAction.TYPING)
 
     try:
-        plan = await asyncio.to_thread(SERVICE.generate_dca_plan, ticker, first_cost_basis)
+        plan = await context.bot_data["service"].generate_dca_plan(ticker, first_cost_basis)
         await update.message.reply_text(format_dca_plan(plan), parse_mode=ParseMode.MARKDOWN)
     except ValidationError as exc:
         await update.message.reply_text(f"Error: {exc}")
@@ -93,7 +94,7 @@ async def funding_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Non
     await update.message.chat.send_action(action=ChatAction.TYPING)
 
     try:
-        report = await asyncio.to_thread(SERVICE.generate_funding_report, 10)
+        report = await context.bot_data["service"].generate_funding_report(10)
         await update.message.reply_text(report, parse_mode=ParseMode.MARKDOWN)
     except BotError as exc:
         await update.message.reply_text(f"Error: {exc}")
@@ -112,7 +113,7 @@ async def analyze_ticker(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     await update.message.chat.send_action(action=ChatAction.TYPING)
 
     try:
-        report = await asyncio.to_thread(SERVICE.generate_report, user_text)
+        report = await context.bot_data["service"].generate_report(user_text)
         await update.message.reply_text(report, parse_mode=ParseMode.MARKDOWN)
     except BotError as exc:
         await update.message.reply_text(f"Error: {exc}")
@@ -123,12 +124,23 @@ async def analyze_ticker(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
 
 
+async def startup(app: Application) -> None:
+    await app.bot_data["service"].warmup()
+
+
+async def shutdown(app: Application) -> None:
+    await app.bot_data["service"].close()
+
+
 def main() -> None:
     token = os.getenv("TELEGRAM_BOT_TOKEN", "").strip()
     if not token:
         raise RuntimeError("TELEGRAM_BOT_TOKEN environment variable is required.")
 
-    app = Application.builder().token(token).build()
+    app = (
+        Application.builder().token(token).post_init(startup).post_shutdown(shutdown).build()
+    )
+    app.bot_data["service"] = build_service()
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_cmd))
     app.add_handler(CommandHandler("dca", dca_cmd))
@@ -138,7 +150,14 @@ def main() -> None:
     )
 
     LOGGER.info("Bot started")
-    app.run_polling(close_loop=False)
+    # Long polling: Telegram holds each getUpdates open for up to 30s instead of answering empty.
+    app.run_polling(
+        poll_interval=0.0,
+        timeout=30,
+        bootstrap_retries=-1,
+        allowed_updates=[Update.MESSAGE],
+        close_loop=False,
+    )
 
 
 if __name__ == "__main__":
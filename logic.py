@@ -1,18 +1,26 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import math
 import os
-import re
+import string
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any
 
+import aiohttp
 import numpy as np
-import requests
+import orjson
+from numba import njit
 
 LOGGER = logging.getLogger(__name__)
 BYBIT_BASE_URL = "https://api.bybit.com"
+# Every ASCII byte except A-Z and 0-9; deleted via bytes.translate when normalizing tickers.
+_TICKER_DELETE = bytes(
+    b for b in range(128) if chr(b) not in string.ascii_uppercase + string.digits
+)
 
 
 class BotError(Exception):
@@ -38,13 +46,16 @@ class SymbolResolution:
 
 
 @dataclass(frozen=True)
-class OHLCVCandle:
-    ts: int
-    open: float
-    high: float
-    low: float
-    close: float
-    volume: float
+class OHLCVSeries:
+    ts: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ts)
 
 
 @dataclass(frozen=True)
@@ -76,6 +87,15 @@ class FundingEntry:
 
 
 class BybitClient:
+    SYMBOL_CACHE_TTL = 3600.0
+    SYMBOL_MISS_TTL = 60.0
+    SYMBOL_CACHE_SIZE = 1024
+    OHLCV_CACHE_TTL = 300.0
+    OHLCV_CACHE_SIZE = 256
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    CATEGORY_ORDER = ("linear", "inverse", "spot")
+    INSTRUMENT_INDEX_TTL = 6 * 3600.0
+
     def __init__(
         self,
         base_url: str = BYBIT_BASE_URL,
@@ -83,61 +103,229 @@ class BybitClient:
         retries: int = 3,
         api_key: str = "",
         api_secret: str = "",
+        session: aiohttp.ClientSession | None = None,
+        pool_size: int = 100,
+        pool_size_per_host: int = 20,
+        keepalive_timeout: float = 60.0,
     ):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
         self.retries = retries
         self.api_key = api_key.strip() or os.getenv("BYBIT_API_KEY", "").strip()
         self.api_secret = api_secret.strip() or os.getenv("BYBIT_API_SECRET", "").strip()
-        self.session = requests.Session()
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.headers = {"Accept-Encoding": "gzip"}
         if self.api_key:
-            self.session.headers.update({"X-BAPI-API-KEY": self.api_key})
+            self.headers["X-BAPI-API-KEY"] = self.api_key
+        # The session is created lazily so it binds to the event loop that actually runs the bot.
+        self._session = session
+        # normalized ticker -> (stored_at, resolution); None marks a recent "not found".
+        self._symbol_cache: dict[str, tuple[float, SymbolResolution | None]] = {}
+        self._ohlcv_cache: dict[tuple[str, str, int], tuple[float, OHLCVSeries]] = {}
+        # Per-key fetch locks, dropped again once no request is waiting on them.
+        self._ohlcv_locks: dict[tuple[str, str, int], asyncio.Lock] = {}
+        self._ohlcv_lock_users: dict[tuple[str, str, int], int] = {}
+        # category -> every listed symbol, refreshed in the background once it expires.
+        self._instrument_index: dict[str, frozenset[str]] = {}
+        self._index_expires_at = 0.0
+        self._index_refresh: asyncio.Future[None] | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            # Idle connections stay open between messages so follow-up requests skip the TLS handshake.
+            connector = aiohttp.TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.pool_size_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, headers=self.headers)
+        return self._session
+
+    async def close(self) -> None:
+        if self._index_refresh is not None:
+            self._index_refresh.cancel()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
 
-    def _request(self, path: str, params: dict[str, Any]) -> dict[str, Any]:
+    async def warmup(self) -> None:
+        # Loading the instrument index also opens pooled connections (DNS + TLS)
+        # before the first user request needs one.
+        await self.refresh_instrument_index()
+
+    async def _request(self, path: str, params: dict[str, Any]) -> dict[str, Any]:
         url = f"{self.base_url}{path}"
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
         delay = 0.5
 
         for attempt in range(1, self.retries + 1):
             try:
-                response = self.session.get(url, params=params, timeout=self.timeout)
-                response.raise_for_status()
-                payload = response.json()
-                if payload.get("retCode") != 0:
-                    raise BybitAPIError(f"Bybit error {payload.get('retCode')}: {payload.get('retMsg')}")
-                return payload
-            except (requests.RequestException, ValueError, BybitAPIError) as exc:
+                async with self.session.get(url, params=params, timeout=timeout) as response:
+                    response.raise_for_status()
+                    body = await response.read()
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
                 LOGGER.warning("Bybit request failed (%s/%s): %s", attempt, self.retries, exc)
-                if attempt == self.retries:
+                # Only transport failures and throttling/5xx statuses are worth retrying.
+                retryable = (
+                    not isinstance(exc, aiohttp.ClientResponseError) or exc.status in self.RETRY_STATUSES
+                )
+                if not retryable or attempt == self.retries:
                     raise BybitAPIError("Could not reach Bybit API. Please try again shortly.") from exc
-                time.sleep(delay)
+                await asyncio.sleep(max(delay, min(_retry_after_seconds(exc), self.timeout)))
                 delay *= 2
-
-        raise BybitAPIError("Unexpected API failure.")
-
-    def resolve_symbol(self, ticker: str) -> SymbolResolution:
+        else:
+            raise BybitAPIError("Unexpected API failure.")
+
+        try:
+            payload = orjson.loads(body)
+        except ValueError as exc:
+            LOGGER.warning("Bybit returned an invalid JSON payload: %s", exc)
+            raise BybitAPIError("Bybit returned an unreadable response. Please try again shortly.") from exc
+        if payload.get("retCode") != 0:
+            raise BybitAPIError(f"Bybit error {payload.get('retCode')}: {payload.get('retMsg')}")
+        return payload
+
+    async def resolve_symbol(self, ticker: str) -> SymbolResolution:
         normalized = normalize_ticker(ticker)
 
+        cached = self._symbol_cache.get(normalized)
+        if cached is not None:
+            stored_at, resolution = cached
+            ttl = self.SYMBOL_CACHE_TTL if resolution is not None else self.SYMBOL_MISS_TTL
+            if time.monotonic() - stored_at < ttl:
+                if resolution is None:
+                    raise SymbolNotFoundError(
+                        f"Ticker '{normalized}' was not found on Bybit (Linear, Inverse, or Spot)."
+                    )
+                return resolution
+
         candidates = [normalized]
         if not normalized.endswith(("USDT", "USDC", "USD")):
             candidates = [f"{normalized}USDT", f"{normalized}USD", normalized]
 
-        category_order = ["linear", "inverse", "spot"]
-        for category in category_order:
+        # A loaded, unexpired index answers every lookup without a request, misses included;
+        # per-symbol probing only covers the window before it first loads.
+        resolution = self._lookup_instrument_index(candidates)
+        index_fresh = bool(self._instrument_index) and time.monotonic() < self._index_expires_at
+        if resolution is None and not index_fresh:
+            resolution = await self._probe_symbol(candidates)
+        self._cache_symbol(normalized, resolution)
+        if resolution is None:
+            raise SymbolNotFoundError(
+                f"Ticker '{normalized}' was not found on Bybit (Linear, Inverse, or Spot)."
+            )
+        return resolution
+
+    def _lookup_instrument_index(self, candidates: list[str]) -> SymbolResolution | None:
+        if time.monotonic() >= self._index_expires_at and (
+            self._index_refresh is None or self._index_refresh.done()
+        ):
+            self._index_refresh = asyncio.ensure_future(self.refresh_instrument_index())
+
+        for category in self.CATEGORY_ORDER:
+            symbols = self._instrument_index.get(category, frozenset())
             for candidate in candidates:
-                payload = self._request(
-                    "/v5/market/instruments-info",
-                    {"category": category, "symbol": candidate},
-                )
+                if candidate in symbols:
+                    return SymbolResolution(category=category, symbol=candidate)
+        return None
+
+    async def _probe_symbol(self, candidates: list[str]) -> SymbolResolution | None:
+        probes = [(category, candidate) for category in self.CATEGORY_ORDER for candidate in candidates]
+        # All probes run concurrently, but results are consumed in priority order so the
+        # highest-priority match wins as soon as every probe ahead of it has come back empty.
+        tasks = [
+            asyncio.ensure_future(
+                self._request("/v5/market/instruments-info", {"category": category, "symbol": candidate})
+            )
+            for category, candidate in probes
+        ]
+        try:
+            for (category, _), task in zip(probes, tasks):
+                payload = await task
                 instruments = payload.get("result", {}).get("list", [])
                 if instruments:
                     return SymbolResolution(category=category, symbol=instruments[0]["symbol"])
-
-        raise SymbolNotFoundError(
-            f"Ticker '{normalized}' was not found on Bybit (Linear, Inverse, or Spot)."
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return None
+
+    async def refresh_instrument_index(self) -> None:
+        # Until this load succeeds, lookups wait a minute before starting another refresh.
+        self._index_expires_at = time.monotonic() + self.SYMBOL_MISS_TTL
+        try:
+            listings = await asyncio.gather(
+                *(self._fetch_instrument_symbols(category) for category in self.CATEGORY_ORDER)
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            LOGGER.warning(
+                "Could not load Bybit instrument index: %s", exc, exc_info=not isinstance(exc, BotError)
+            )
+            return
+        self._instrument_index = dict(zip(self.CATEGORY_ORDER, listings))
+        self._index_expires_at = time.monotonic() + self.INSTRUMENT_INDEX_TTL
+        LOGGER.info(
+            "Loaded Bybit instrument index: %s",
+            ", ".join(f"{category}={len(symbols)}" for category, symbols in self._instrument_index.items()),
         )
 
-    def fetch_daily_ohlcv(self, category: str, symbol: str, limit: int = 1000) -> list[OHLCVCandle]:
-        payload = self._request(
+    async def _fetch_instrument_symbols(self, category: str) -> frozenset[str]:
+        symbols: set[str] = set()
+        params: dict[str, Any] = {"category": category, "limit": 1000}
+        while True:
+            payload = await self._request("/v5/market/instruments-info", params)
+            result = payload.get("result", {})
+            for item in result.get("list", []):
+                symbol = item.get("symbol", "")
+                if symbol:
+                    symbols.add(symbol)
+            cursor = result.get("nextPageCursor")
+            if not cursor:
+                return frozenset(symbols)
+            params = {**params, "cursor": cursor}
+
+    def _cache_symbol(self, normalized: str, resolution: SymbolResolution | None) -> None:
+        self._symbol_cache.pop(normalized, None)
+        if len(self._symbol_cache) >= self.SYMBOL_CACHE_SIZE:
+            # Entries are kept in insertion order, so the first one is the oldest.
+            del self._symbol_cache[next(iter(self._symbol_cache))]
+        self._symbol_cache[normalized] = (time.monotonic(), resolution)
+
+    async def fetch_daily_ohlcv(self, category: str, symbol: str, limit: int = 1000) -> OHLCVSeries:
+        key = (category, symbol, min(limit, 1000))
+        # Concurrent requests for the same symbol wait on one in-flight fetch instead of racing.
+        lock = self._ohlcv_locks.setdefault(key, asyncio.Lock())
+        self._ohlcv_lock_users[key] = self._ohlcv_lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                cached = self._ohlcv_cache.get(key)
+                if cached is not None:
+                    if time.monotonic() - cached[0] < self.OHLCV_CACHE_TTL:
+                        return cached[1]
+                    del self._ohlcv_cache[key]
+                candles = await self._fetch_daily_ohlcv(*key)
+                self._cache_ohlcv(key, candles)
+                return candles
+        finally:
+            self._ohlcv_lock_users[key] -= 1
+            if not self._ohlcv_lock_users[key]:
+                del self._ohlcv_lock_users[key]
+                del self._ohlcv_locks[key]
+
+    def _cache_ohlcv(self, key: tuple[str, str, int], candles: OHLCVSeries) -> None:
+        self._ohlcv_cache.pop(key, None)
+        if len(self._ohlcv_cache) >= self.OHLCV_CACHE_SIZE:
+            # Entries are kept in insertion order, so the first one is the oldest.
+            del self._ohlcv_cache[next(iter(self._ohlcv_cache))]
+        self._ohlcv_cache[key] = (time.monotonic(), candles)
+
+    async def _fetch_daily_ohlcv(self, category: str, symbol: str, limit: int) -> OHLCVSeries:
+        payload = await self._request(
             "/v5/market/kline",
             {
                 "category": category,
@@ -150,24 +338,19 @@ class BybitClient:
         if len(raw_rows) < 30:
             raise BybitAPIError("Not enough history available (need at least 30 daily candles).")
 
-        candles: list[OHLCVCandle] = []
-        for row in raw_rows:
-            candles.append(
-                OHLCVCandle(
-                    ts=int(row[0]),
-                    open=float(row[1]),
-                    high=float(row[2]),
-                    low=float(row[3]),
-                    close=float(row[4]),
-                    volume=float(row[5]),
-                )
-            )
-
-        candles.sort(key=lambda c: c.ts)
-        return candles
-
-    def fetch_most_negative_funding(self, limit: int = 10) -> list[FundingEntry]:
-        payload = self._request(
+        # Bybit rows are [start, open, high, low, close, volume, turnover] as strings.
+        arr = np.asarray(raw_rows, dtype=np.float64)[:, :6]
+        ts = arr[:, 0]
+        if np.all(ts[:-1] > ts[1:]):
+            # Bybit lists klines newest first, so a reversed view is usually all the sorting needed.
+            arr = arr[::-1]
+        elif np.any(ts[:-1] > ts[1:]):
+            arr = arr[np.argsort(ts, kind="stable")]
+        ts, o, h, l, c, v = np.ascontiguousarray(arr.T)
+        return OHLCVSeries(ts=ts.astype(np.int64), open=o, high=h, low=l, close=c, volume=v)
+
+    async def fetch_most_negative_funding(self, limit: int = 10) -> list[FundingEntry]:
+        payload = await self._request(
             "/v5/market/tickers",
             {
                 "category": "linear",
@@ -197,76 +380,176 @@ class BybitClient:
         return entries[: max(1, limit)]
 
 
-class VolatilityAnalyzer:
-    PERCENTILES = [75, 80, 85, 90, 95, 99]
-
-    def analyze(self, candles: list[OHLCVCandle]) -> dict[str, Any]:
-        o = np.array([c.open for c in candles], dtype=np.float64)
-        h = np.array([c.high for c in candles], dtype=np.float64)
-        l = np.array([c.low for c in candles], dtype=np.float64)
-        c = np.array([c.close for c in candles], dtype=np.float64)
-
-        log_returns = np.diff(np.log(c))
-        simple_returns = np.diff(c) / c[:-1]
-
-        pump = (h - o) / o
-        dump = (l - o) / o
+@njit(cache=True, nogil=True)
+def _analyze_kernel(o, h, l, c, percentiles):
+    n = c.shape[0]
+    pump = np.empty(n)
+    # Only the last 28 true ranges feed ATR(14)/ATR(28), so they are summed in place
+    # instead of being materialised as a full-length array.
+    atr_14_start = n - 14
+    atr_28_start = n - 28
+
+    # Running mean / sum of squared deviations (Welford), so each spread needs no second pass
+    # and avoids the cancellation of the naive sum-of-squares formula.
+    ret_mean = 0.0
+    ret_m2 = 0.0
+    surge = -np.inf
+    crash = np.inf
+    pump_mean = 0.0
+    pump_m2 = 0.0
+    pump_best = -np.inf
+    dump_mean = 0.0
+    dump_m2 = 0.0
+    dump_worst = np.inf
+    atr_14 = 0.0
+    atr_28 = 0.0
+
+    for i in range(n):
+        up = (h[i] - o[i]) / o[i]
+        down = (l[i] - o[i]) / o[i]
+        pump[i] = up
+        delta = up - pump_mean
+        pump_mean += delta / (i + 1)
+        pump_m2 += delta * (up - pump_mean)
+        pump_best = max(pump_best, up)
+        delta = down - dump_mean
+        dump_mean += delta / (i + 1)
+        dump_m2 += delta * (down - dump_mean)
+        dump_worst = min(dump_worst, down)
+
+        prev_close = c[i - 1] if i > 0 else c[0]
+        if i >= atr_28_start:
+            true_range = max(h[i] - l[i], abs(h[i] - prev_close), abs(l[i] - prev_close))
+            atr_28 += true_range
+            if i >= atr_14_start:
+                atr_14 += true_range
+
+        if i > 0:
+            log_return = math.log(c[i]) - math.log(prev_close)
+            delta = log_return - ret_mean
+            ret_mean += delta / i
+            ret_m2 += delta * (log_return - ret_mean)
+            simple_return = (c[i] - prev_close) / prev_close
+            surge = max(surge, simple_return)
+            crash = min(crash, simple_return)
+
+    daily_vol = math.sqrt(ret_m2 / (n - 2))
+    pump_std = math.sqrt(pump_m2 / (n - 1))
+    dump_std = math.sqrt(dump_m2 / (n - 1))
+
+    # Sort once and interpolate every percentile from it (same "linear" method as np.percentile).
+    sorted_pump = np.sort(pump)
+    dca_levels = np.empty(percentiles.shape[0])
+    for k in range(percentiles.shape[0]):
+        rank = percentiles[k] / 100.0 * (n - 1)
+        lower = int(math.floor(rank))
+        upper = min(lower + 1, n - 1)
+        dca_levels[k] = sorted_pump[lower] + (sorted_pump[upper] - sorted_pump[lower]) * (rank - lower)
+
+    return (
+        daily_vol,
+        surge,
+        crash,
+        pump_mean,
+        pump_std,
+        pump_best,
+        dump_mean,
+        dump_std,
+        dump_worst,
+        atr_14 / 14,
+        atr_28 / 28,
+        dca_levels,
+    )
 
-        prev_close = np.roll(c, 1)
-        prev_close[0] = c[0]
 
-        true_range = np.maximum.reduce([
-            h - l,
-            np.abs(h - prev_close),
-            np.abs(l - prev_close),
-        ])
+class VolatilityAnalyzer:
+    PERCENTILES = [75, 80, 85, 90, 95, 99]
 
-        atr_14 = float(np.mean(true_range[-14:]))
-        atr_28 = float(np.mean(true_range[-28:]))
+    def warmup(self) -> None:
+        # Compile (or load the cached) kernel up front so the first user request doesn't pay for it.
+        prices = np.linspace(1.0, 2.0, 30)
+        _analyze_kernel(prices, prices * 1.01, prices * 0.99, prices, np.asarray(self.PERCENTILES, dtype=np.float64))
+
+    def analyze(self, candles: OHLCVSeries) -> dict[str, Any]:
+        c = candles.close
+        (
+            daily_vol,
+            max_daily_surge,
+            max_daily_crash,
+            pump_avg,
+            pump_std,
+            pump_best,
+            dump_avg,
+            dump_std,
+            dump_worst,
+            atr_14,
+            atr_28,
+            dca_levels,
+        ) = _analyze_kernel(
+            candles.open,
+            candles.high,
+            candles.low,
+            c,
+            np.asarray(self.PERCENTILES, dtype=np.float64),
+        )
 
         return {
             "candle_count": len(candles),
-            "daily_vol": float(np.std(log_returns, ddof=1)),
-            "weekly_vol": float(np.std(log_returns, ddof=1) * math.sqrt(7)),
-            "max_daily_surge": float(np.max(simple_returns)),
-            "max_daily_crash": float(np.min(simple_returns)),
-            "pump_avg": float(np.mean(pump)),
-            "pump_std": float(np.std(pump, ddof=1)),
-            "pump_best": float(np.max(pump)),
-            "dump_avg": float(np.mean(dump)),
-            "dump_std": float(np.std(dump, ddof=1)),
-            "dump_worst": float(np.min(dump)),
-            "atr_14": atr_14,
-            "atr_28": atr_28,
+            "daily_vol": float(daily_vol),
+            "weekly_vol": float(daily_vol * math.sqrt(7)),
+            "max_daily_surge": float(max_daily_surge),
+            "max_daily_crash": float(max_daily_crash),
+            "pump_avg": float(pump_avg),
+            "pump_std": float(pump_std),
+            "pump_best": float(pump_best),
+            "dump_avg": float(dump_avg),
+            "dump_std": float(dump_std),
+            "dump_worst": float(dump_worst),
+            "atr_14": float(atr_14),
+            "atr_28": float(atr_28),
             "atr_14_pct": float(atr_14 / c[-1]),
             "atr_28_pct": float(atr_28 / c[-1]),
-            "dca_levels": {p: float(np.percentile(pump, p)) for p in self.PERCENTILES},
+            "dca_levels": {p: float(level) for p, level in zip(self.PERCENTILES, dca_levels)},
         }
 
 
 class VolatilityReportService:
-    def __init__(self, bybit: BybitClient, analyzer: VolatilityAnalyzer):
+    def __init__(self, bybit: BybitClient, analyzer: VolatilityAnalyzer, max_workers: int = 4):
         self.bybit = bybit
         self.analyzer = analyzer
+        # Analysis gets its own pool so it never queues behind the loop's default executor.
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+
+    async def warmup(self) -> None:
+        await self.bybit.warmup()
+
+    async def close(self) -> None:
+        await self.bybit.close()
+        self.executor.shutdown(wait=False)
 
-    def generate_report(self, user_text: str) -> str:
-        resolution = self.bybit.resolve_symbol(user_text)
-        candles = self.bybit.fetch_daily_ohlcv(resolution.category, resolution.symbol, limit=1000)
-        stats = self.analyzer.analyze(candles)
+    async def _analyze(self, candles: OHLCVSeries) -> dict[str, Any]:
+        # Network I/O stays on the event loop; only the numpy math is offloaded.
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.analyzer.analyze, candles)
+
+    async def generate_report(self, user_text: str) -> str:
+        resolution = await self.bybit.resolve_symbol(user_text)
+        candles = await self.bybit.fetch_daily_ohlcv(resolution.category, resolution.symbol, limit=1000)
+        stats = await self._analyze(candles)
         return format_report(resolution, stats)
 
-    def generate_funding_report(self, limit: int = 10) -> str:
-        entries = self.bybit.fetch_most_negative_funding(limit=limit)
+    async def generate_funding_report(self, limit: int = 10) -> str:
+        entries = await self.bybit.fetch_most_negative_funding(limit=limit)
         return format_funding_report(entries)
 
-    def generate_dca_plan(self, user_text: str, first_cost_basis: float) -> DCAPlan:
+    async def generate_dca_plan(self, user_text: str, first_cost_basis: float) -> DCAPlan:
         if first_cost_basis <= 0:
             raise ValidationError("First cost basis must be a positive number (e.g., 1000).")
 
-        resolution = self.bybit.resolve_symbol(user_text)
-        candles = self.bybit.fetch_daily_ohlcv(resolution.category, resolution.symbol, limit=1000)
-        stats = self.analyzer.analyze(candles)
-        current_price = candles[-1].close
+        resolution = await self.bybit.resolve_symbol(user_text)
+        candles = await self.bybit.fetch_daily_ohlcv(resolution.category, resolution.symbol, limit=1000)
+        stats = await self._analyze(candles)
+        current_price = float(candles.close[-1])
 
         # 6 sessions total:
         # S1 at current price (user's first entry), then 5 upward DCA sessions by percentile levels.
@@ -325,8 +608,16 @@ class VolatilityReportService:
         )
 
 
+def _retry_after_seconds(exc: BaseException) -> float:
+    headers = getattr(exc, "headers", None) or {}
+    try:
+        return max(float(headers.get("Retry-After", 0)), 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
 def normalize_ticker(raw: str) -> str:
-    cleaned = re.sub(r"[^A-Za-z0-9]", "", raw.upper().strip())
+    cleaned = raw.upper().encode("ascii", "ignore").translate(None, _TICKER_DELETE).decode("ascii")
     if not cleaned:
         raise ValidationError("Please send a valid ticker (e.g., BTC, ETHUSDT, PEPE).")
     if len(cleaned) > 20:
@@ -334,44 +625,31 @@ def normalize_ticker(raw: str) -> str:
     return cleaned
 
 
-def pct(value: float) -> str:
-    return f"{value * 100:.2f}%"
-
-
 def format_report(resolution: SymbolResolution, stats: dict[str, Any]) -> str:
-    lines = [
-        f"*Volatility Analysis — {resolution.symbol}*",
-        f"Market: `{resolution.category}` | Candles: `{stats['candle_count']}`",
-        "",
-        "*Daily Stats*",
-        f"• Volatility (Daily): `{pct(stats['daily_vol'])}`",
-        f"• Volatility (Weekly): `{pct(stats['weekly_vol'])}`",
-        f"• Max Daily Surge: `{pct(stats['max_daily_surge'])}`",
-        f"• Max Daily Crash: `{pct(stats['max_daily_crash'])}`",
-        "",
-        "*Intraday Pump / Dump*",
-        f"• Pump Avg / Std: `{pct(stats['pump_avg'])}` / `{pct(stats['pump_std'])}`",
-        f"• Best Pump: `{pct(stats['pump_best'])}`",
-        f"• Dump Avg / Std: `{pct(stats['dump_avg'])}` / `{pct(stats['dump_std'])}`",
-        f"• Worst Dump: `{pct(stats['dump_worst'])}`",
-        "",
-        "*Risk Metrics (ATR)*",
-        f"• ATR(14): `{stats['atr_14']:.6f}` ({pct(stats['atr_14_pct'])})",
-        f"• ATR(28): `{stats['atr_28']:.6f}` ({pct(stats['atr_28_pct'])})",
-        "",
-        "*Martingale / DCA Levels (Pump Percentiles)*",
-    ]
-
-    for percentile, move in stats["dca_levels"].items():
-        lines.append(f"• P{percentile}: `{pct(move)}`")
-
-    lines.extend(
-        [
-            "",
-            "_Tip: Higher percentile levels represent rarer up-moves and can be used as more conservative DCA zones._",
-        ]
-    )
-    return "\n".join(lines)
+    dca_block = "\n".join(f"• P{percentile}: `{move:.2%}`" for percentile, move in stats["dca_levels"].items())
+    return f"""*Volatility Analysis — {resolution.symbol}*
+Market: `{resolution.category}` | Candles: `{stats['candle_count']}`
+
+*Daily Stats*
+• Volatility (Daily): `{stats['daily_vol']:.2%}`
+• Volatility (Weekly): `{stats['weekly_vol']:.2%}`
+• Max Daily Surge: `{stats['max_daily_surge']:.2%}`
+• Max Daily Crash: `{stats['max_daily_crash']:.2%}`
+
+*Intraday Pump / Dump*
+• Pump Avg / Std: `{stats['pump_avg']:.2%}` / `{stats['pump_std']:.2%}`
+• Best Pump: `{stats['pump_best']:.2%}`
+• Dump Avg / Std: `{stats['dump_avg']:.2%}` / `{stats['dump_std']:.2%}`
+• Worst Dump: `{stats['dump_worst']:.2%}`
+
+*Risk Metrics (ATR)*
+• ATR(14): `{stats['atr_14']:.6f}` ({stats['atr_14_pct']:.2%})
+• ATR(28): `{stats['atr_28']:.6f}` ({stats['atr_28_pct']:.2%})
+
+*Martingale / DCA Levels (Pump Percentiles)*
+{dca_block}
+
+_Tip: Higher percentile levels represent rarer up-moves and can be used as more conservative DCA zones._"""
 
 
 def format_funding_report(entries: list[FundingEntry]) -> str: